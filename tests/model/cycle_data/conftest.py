@@ -0,0 +1,13 @@
+import pytest
+
+from treeherder.model.data_cycling import removal_strategies
+
+
+@pytest.fixture(autouse=True)
+def forget_cached_try_repo_id():
+    # the try repository gets recreated (with a different id)
+    # for every test, so the process-level cache must not leak
+    # between them
+    removal_strategies._get_try_repo_id.cache_clear()
+    yield
+    removal_strategies._get_try_repo_id.cache_clear()
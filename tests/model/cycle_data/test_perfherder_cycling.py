@@ -14,6 +14,7 @@ from treeherder.model.data_cycling import PublicSignatureRemover
 from treeherder.model.data_cycling.removal_strategies import (
     MainRemovalStrategy,
     TryDataRemoval,
+    CompositeRemovalStrategy,
     IrrelevantDataRemoval,
     StalledDataRemoval,
 )
@@ -543,6 +544,11 @@ def test_explicit_days_validation_on_treeherder_prototype2_environment(days):
     except ValueError:
         pytest.fail()
 
+    try:
+        _ = CompositeRemovalStrategy(10_000, days=days)
+    except ValueError:
+        pytest.fail()
+
     try:
         _ = IrrelevantDataRemoval(10_000, days=days)
     except ValueError:
@@ -566,6 +572,9 @@ def test_explicit_days_validation_on_envs_other_than_treeherder_prototype2(days)
     with pytest.raises(ValueError):
         _ = TryDataRemoval(10_000, days=days)
 
+    with pytest.raises(ValueError):
+        _ = CompositeRemovalStrategy(10_000, days=days)
+
     with pytest.raises(ValueError):
         _ = IrrelevantDataRemoval(10_000, days=days)
 
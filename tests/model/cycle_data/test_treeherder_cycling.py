@@ -6,7 +6,16 @@ from django.db.models import Max
 
 from tests import test_utils
 from tests.autoclassify.utils import create_failure_lines, test_line
-from treeherder.model.models import Job, FailureLine, JobLog, JobType, Machine, JobGroup
+from treeherder.model.models import (
+    Job,
+    FailureLine,
+    JobLog,
+    JobType,
+    Machine,
+    JobGroup,
+    InvestigatedTests,
+    Push,
+)
 from treeherder.perf.models import PerformanceDatum
 
 
@@ -160,6 +169,27 @@ def test_cycle_job_model_reference_data(
     assert Machine.objects.filter(id__in=original_machine_ids).count() == len(original_machine_ids)
 
 
+def test_cycle_job_type_with_investigated_tests(
+    test_repository, failure_classifications, sample_data, sample_push, mock_log_parser
+):
+    """
+    Unused job types must still take their dependent
+    InvestigatedTests rows with them when pruned.
+    """
+    job_data = sample_data.job_data[:20]
+    test_utils.do_job_ingestion(test_repository, job_data, sample_push, False)
+
+    job_type = JobType.objects.create(symbol='mu', name='mu')
+    InvestigatedTests.objects.create(
+        job_type=job_type, test='mytest', push=Push.objects.first()
+    )
+
+    call_command('cycle_data', 'from:treeherder', sleep_time=0, days=1, chunk_size=3)
+
+    assert JobType.objects.filter(id=job_type.id).count() == 0
+    assert InvestigatedTests.objects.count() == 0
+
+
 # Treeherder's data cycling can have some impact upon
 # Perfherder data. Test cases touching this aspect
 # should be defined bellow.
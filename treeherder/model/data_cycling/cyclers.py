@@ -1,9 +1,12 @@
 import logging
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime
+from itertools import islice
 from typing import List
 
-from django.db import OperationalError, connection
+from django.db import OperationalError, connection, connections, transaction
 from django.db.backends.utils import CursorWrapper
 from django.db.models import Count
 
@@ -56,35 +59,91 @@ class TreeherderCycler(DataCycler):
             rs_deleted = Job.objects.cycle_data(
                 self.cycle_interval, self.chunk_size, self.sleep_time
             )
-            logger.warning("Deleted {} jobs".format(rs_deleted))
+            logger.warning("Deleted %s jobs", rs_deleted)
         except OperationalError as e:
-            logger.error("Error running cycle_data: {}".format(e))
+            logger.error("Error running cycle_data: %s", e)
 
         self._remove_leftovers()
 
     def _remove_leftovers(self):
         logger.warning('Pruning ancillary data: job types, groups and machines')
 
-        def prune(id_name, model):
-            logger.warning('Pruning {}s'.format(model.__name__))
-            used_ids = Job.objects.only(id_name).values_list(id_name, flat=True).distinct()
-            unused_ids = model.objects.exclude(id__in=used_ids).values_list('id', flat=True)
-
-            logger.warning('Removing {} records from {}'.format(len(unused_ids), model.__name__))
+        def fetch_used_ids(id_name):
+            # a DISTINCT scan of a foreign-key column resolves as an
+            # index-only scan of job.<id_name>; fetching the set once
+            # up front spares the delete loop any job-table subqueries
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT DISTINCT {id_name} FROM job')
+                return {row[0] for row in cursor.fetchall()}
 
-            while len(unused_ids):
-                delete_ids = unused_ids[: self.chunk_size]
-                logger.warning('deleting {} of {}'.format(len(delete_ids), len(unused_ids)))
-                model.objects.filter(id__in=delete_ids).delete()
-                unused_ids = unused_ids[self.chunk_size :]
+        def prune(id_name, model):
+            logger.warning('Pruning %ss', model.__name__)
+            used_ids = fetch_used_ids(id_name)
+
+            # reverse relations other than Job (whose referencing rows
+            # are gone by construction) need their rows deleted by hand,
+            # since raw deletes won't walk Django's cascades; resolved
+            # once here instead of once per chunk by the collector
+            dependents = [
+                relation
+                for relation in model._meta.related_objects
+                if relation.related_model is not Job
+            ]
+
+            # the reference tables are small compared to job, so stream
+            # their ids and sieve them against the used set in-process,
+            # deleting in fixed-size batches
+            unused_ids = (
+                row_id
+                for row_id in model.objects.values_list('id', flat=True).iterator(
+                    chunk_size=self.chunk_size
+                )
+                if row_id not in used_ids
+            )
+            while True:
+                delete_ids = list(islice(unused_ids, self.chunk_size))
+                if not delete_ids:
+                    break
 
-        prune('job_type_id', JobType)
-        prune('job_group_id', JobGroup)
-        prune('machine_id', Machine)
+                logger.warning(
+                    'deleting %d unused records from %s', len(delete_ids), model.__name__
+                )
+                for relation in dependents:
+                    relation.related_model.objects.filter(
+                        **{f'{relation.field.name}__in': delete_ids}
+                    ).delete()
+                # with the dependent rows gone there's nothing left to
+                # cascade to nor any signal receivers to dispatch, so
+                # skip Django's collector entirely
+                doomed = model.objects.filter(id__in=delete_ids)
+                doomed._raw_delete(doomed.db)
+
+        def prune_in_thread(id_name, model):
+            try:
+                prune(id_name, model)
+            finally:
+                # Django opens a fresh connection per worker thread,
+                # which nothing else will ever clean up
+                connections.close_all()
+
+        # the three prunes target disjoint tables, so they can
+        # safely overlap, each on its own database connection
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(prune_in_thread, 'job_type_id', JobType),
+                executor.submit(prune_in_thread, 'job_group_id', JobGroup),
+                executor.submit(prune_in_thread, 'machine_id', Machine),
+            ]
+            for future in futures:
+                future.result()  # propagate any pruning failure
 
 
 class PerfherderCycler(DataCycler):
     DEFAULT_MAX_RUNTIME = timedelta(hours=23)
+    # maximum chunk deletes grouped under a single transaction;
+    # trades slightly longer-held row locks for far fewer
+    # commit-time fsyncs of the redo & binary logs
+    CHUNKS_PER_COMMIT = 10
 
     @has_valid_explicit_days
     def __init__(
@@ -98,7 +157,11 @@ class PerfherderCycler(DataCycler):
     ):
         super().__init__(chunk_size, sleep_time, is_debug)
         self.strategies = strategies or RemovalStrategy.fabricate_all_strategies(
-            chunk_size, days=days
+            # share one time reference across all strategies, so their
+            # expiration thresholds are consistent with each other
+            chunk_size,
+            days=days,
+            started_at=datetime.now(),
         )
         self.timer = MaxRuntime()
 
@@ -162,26 +225,38 @@ class PerfherderCycler(DataCycler):
 
     def _delete_in_chunks(self, strategy: RemovalStrategy):
         any_successful_attempt = False
+        done = False
 
         with connection.cursor() as cursor:
-            while True:
-                self.timer.quit_on_timeout()
-
-                try:
-                    strategy.remove(using=cursor)
-                except Exception as ex:
-                    self.__handle_chunk_removal_exception(ex, cursor, any_successful_attempt)
-                    break
-                else:
-                    deleted_rows = cursor.rowcount
-
-                    if deleted_rows == 0 or deleted_rows == -1:
-                        break  # either finished removing all expired data or failed
-                    else:
-                        any_successful_attempt = True
-                        logger.debug(
-                            'Successfully deleted {} performance datum rows'.format(deleted_rows)
-                        )
+            while not done:
+                with transaction.atomic():
+                    for _ in range(self.CHUNKS_PER_COMMIT):
+                        self.timer.quit_on_timeout()
+
+                        try:
+                            chunk_started_at = time.time()
+                            strategy.remove(using=cursor)
+                        except Exception as ex:
+                            self.__handle_chunk_removal_exception(
+                                ex, cursor, any_successful_attempt
+                            )
+                            done = True
+                            break
+                        else:
+                            deleted_rows = cursor.rowcount
+
+                            if deleted_rows == 0 or deleted_rows == -1:
+                                # either finished removing all expired data or failed
+                                done = True
+                                break
+                            else:
+                                any_successful_attempt = True
+                                logger.debug(
+                                    'Successfully deleted %s performance datum rows', deleted_rows
+                                )
+                                # keep the chunks sized so a single DELETE
+                                # can't block the database for too long
+                                strategy.adjust_chunk_size(time.time() - chunk_started_at)
 
     def __handle_chunk_removal_exception(
         self, exception, cursor: CursorWrapper, any_successful_attempt: bool
@@ -3,19 +3,35 @@ from __future__ import annotations
 import logging
 from abc import ABC, abstractmethod
 from datetime import timedelta, datetime
+from functools import lru_cache
 from itertools import cycle
 from typing import List
 
 from django.db.backends.utils import CursorWrapper
 
 from treeherder.model.models import Repository
-from treeherder.perf.models import PerformanceDatum, PerformanceSignature
+from treeherder.perf.models import PerformanceSignature
 from .utils import has_valid_explicit_days
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _get_try_repo_id() -> int:
+    # the try repository never changes its id
+    # during the lifetime of a cycling process
+    return Repository.objects.get(name='try').id
+
+
 class RemovalStrategy(ABC):
+    # wall-time budget of a single chunk delete; chunks get halved
+    # when a delete overruns it & doubled back while deletes finish
+    # in under a quarter of it
+    SLOW_DELETE_SECONDS = 10.0
+    # never shrink the chunks below this, no matter how slow
+    # the deletes get
+    MIN_CHUNK_SIZE = 100
+
     @property
     @abstractmethod
     def CYCLE_INTERVAL(self) -> int:
@@ -25,12 +41,36 @@ class RemovalStrategy(ABC):
         pass
 
     @has_valid_explicit_days
-    def __init__(self, chunk_size: int, days: int = None):
+    def __init__(self, chunk_size: int, days: int = None, started_at: datetime = None):
         days = days or self.CYCLE_INTERVAL
 
         self._cycle_interval = timedelta(days=days)
         self._chunk_size = chunk_size
-        self._max_timestamp = datetime.now() - self._cycle_interval
+        self._initial_chunk_size = chunk_size
+        # all strategies of a cycling run should share the same
+        # time reference, so their expiration thresholds don't
+        # drift apart between constructions
+        self._started_at = started_at or datetime.now()
+        self._max_timestamp = self._started_at - self._cycle_interval
+
+    def adjust_chunk_size(self, elapsed_seconds: float):
+        """
+        Adaptively resize the delete chunks, based on how long the
+        last chunk delete took: halve them when it overran its time
+        budget (so row locks don't pile up behind a huge DELETE) and
+        grow them back while deletes are comfortably fast, but never
+        beyond the configured size.
+        """
+        if elapsed_seconds > self.SLOW_DELETE_SECONDS:
+            self._chunk_size = max(self._chunk_size // 2, self.MIN_CHUNK_SIZE)
+            logger.debug(
+                'Chunk delete took %.1fs; shrunk chunks to %s', elapsed_seconds, self._chunk_size
+            )
+        elif (
+            elapsed_seconds < self.SLOW_DELETE_SECONDS / 4
+            and self._chunk_size < self._initial_chunk_size
+        ):
+            self._chunk_size = min(self._chunk_size * 2, self._initial_chunk_size)
 
     @abstractmethod
     def remove(self, using: CursorWrapper):
@@ -49,8 +89,9 @@ class RemovalStrategy(ABC):
     @staticmethod
     def fabricate_all_strategies(*args, **kwargs) -> List[RemovalStrategy]:
         return [
-            MainRemovalStrategy(*args, **kwargs),
-            TryDataRemoval(*args, **kwargs),
+            # covers both the main & the try data removal,
+            # via a single DELETE statement per chunk
+            CompositeRemovalStrategy(*args, **kwargs),
             IrrelevantDataRemoval(*args, **kwargs),
             StalledDataRemoval(*args, **kwargs),
             # append here any new strategies
@@ -64,22 +105,30 @@ class MainRemovalStrategy(RemovalStrategy):
     that are at least 1 year old.
     """
 
+    # how many delete chunks may reuse a cached
+    # chunk size before probing the table again
+    PROBE_REFRESH_INTERVAL = 100
+
     @property
     def CYCLE_INTERVAL(self) -> int:
         # WARNING!! Don't override this without proper approval!
         return 365  # days                                     #
         ########################################################
 
-    def __init__(self, chunk_size: int, days: int = None):
-        super().__init__(chunk_size, days=days)
-        self._manager = PerformanceDatum.objects
+    def __init__(self, chunk_size: int, days: int = None, started_at: datetime = None):
+        super().__init__(chunk_size, days=days, started_at=started_at)
+        self._cached_chunk_size = None
+        self._removals_since_probe = 0
+        # upper id bound of the expired data, as
+        # discovered by the latest chunk-size probe
+        self._max_id = None
 
     @property
     def max_timestamp(self):
         return self._max_timestamp
 
     def remove(self, using: CursorWrapper):
-        chunk_size = self._find_ideal_chunk_size()
+        chunk_size = self._ideal_chunk_size(using)
 
         # Django's queryset API doesn't support MySQL's
         # DELETE statements with LIMIT constructs,
@@ -87,26 +136,82 @@ class MainRemovalStrategy(RemovalStrategy):
         #
         # If ever this support is added in Django, replace
         # raw SQL bellow with equivalent queryset commands.
-        using.execute(
-            '''
-            DELETE FROM `performance_datum`
-            WHERE push_timestamp <= %s
-            LIMIT %s
-        ''',
-            [self._max_timestamp, chunk_size],
-        )
+        if self._max_id is not None:
+            # bounding by the probed id turns the delete into a tight
+            # primary-key range scan, instead of a wide index scan
+            # that may revisit rows between calls
+            using.execute(
+                '''
+                DELETE FROM `performance_datum`
+                WHERE push_timestamp <= %s AND id <= %s
+                ORDER BY id
+                LIMIT %s
+            ''',
+                [self._max_timestamp, self._max_id, chunk_size],
+            )
+        else:
+            # every remaining row is expired, so there's no id boundary
+            using.execute(
+                '''
+                DELETE FROM `performance_datum`
+                WHERE push_timestamp <= %s
+                LIMIT %s
+            ''',
+                [self._max_timestamp, chunk_size],
+            )
+
+        self._removals_since_probe += 1
+        if using.rowcount < chunk_size:
+            # we've hit the tail of the expired data;
+            # force a fresh probe on the next call
+            self._cached_chunk_size = None
 
     @property
     def name(self) -> str:
         return 'main removal strategy'
 
-    def _find_ideal_chunk_size(self) -> int:
-        max_id = self._manager.filter(push_timestamp__gt=self._max_timestamp).order_by('-id')[0].id
-        older_ids = self._manager.filter(
-            push_timestamp__lte=self._max_timestamp, id__lte=max_id
-        ).order_by('id')[: self._chunk_size]
+    def _ideal_chunk_size(self, using: CursorWrapper) -> int:
+        if (
+            self._cached_chunk_size is None
+            # the adaptive sizing may have shrunk the
+            # chunks since the size was last probed
+            or self._cached_chunk_size > self._chunk_size
+            or self._removals_since_probe >= self.PROBE_REFRESH_INTERVAL
+        ):
+            self._cached_chunk_size = self._find_ideal_chunk_size(using)
+            self._removals_since_probe = 0
+        return self._cached_chunk_size
+
+    def _find_ideal_chunk_size(self, using: CursorWrapper) -> int:
+        # probing over a raw cursor returns bare integers, skipping
+        # the ORM's queryset compilation & model instantiation;
+        # MAX(id) resolves straight off the (push_timestamp, id)
+        # index, with no filesort of the non-expired partition
+        using.execute(
+            '''
+            SELECT MAX(id) FROM `performance_datum`
+            WHERE push_timestamp > %s
+        ''',
+            [self._max_timestamp],
+        )
+        self._max_id = using.fetchone()[0]
+        if self._max_id is None:
+            # every remaining row is expired; no boundary to respect
+            return self._chunk_size
+
+        using.execute(
+            '''
+            SELECT COUNT(*) FROM (
+                SELECT id FROM `performance_datum`
+                WHERE push_timestamp <= %s AND id <= %s
+                ORDER BY id
+                LIMIT %s
+            ) older_rows
+        ''',
+            [self._max_timestamp, self._max_id, self._chunk_size],
+        )
 
-        return len(older_ids) or self._chunk_size
+        return using.fetchone()[0] or self._chunk_size
 
 
 class TryDataRemoval(RemovalStrategy):
@@ -124,10 +229,9 @@ class TryDataRemoval(RemovalStrategy):
         return 42  # days                                      #
         ########################################################
 
-    def __init__(self, chunk_size: int, days: int = None):
-        super().__init__(chunk_size, days=days)
+    def __init__(self, chunk_size: int, days: int = None, started_at: datetime = None):
+        super().__init__(chunk_size, days=days, started_at=started_at)
 
-        self.__try_repo_id = None
         self.__target_signatures = None
         self.__try_signatures = None
 
@@ -137,9 +241,7 @@ class TryDataRemoval(RemovalStrategy):
 
     @property
     def try_repo(self):
-        if self.__try_repo_id is None:
-            self.__try_repo_id = Repository.objects.get(name='try').id
-        return self.__try_repo_id
+        return _get_try_repo_id()
 
     @property
     def target_signatures(self):
@@ -212,6 +314,96 @@ class TryDataRemoval(RemovalStrategy):
             raise LookupError('Exhausted all signatures originating from try repository.')
 
 
+class CompositeRemovalStrategy(MainRemovalStrategy):
+    """
+    Removes `performance_datum` rows that are at least 1 year old,
+    together with rows originating from the `try` repository that
+    are more than 6 weeks old, using a single DELETE statement
+    per chunk.
+
+    Fusing the two WHERE clauses halves the server round-trips of
+    running `MainRemovalStrategy` & `TryDataRemoval` back-to-back,
+    while still removing the exact same rows.
+    """
+
+    TRY_CYCLE_INTERVAL = 42  # days
+
+    def __init__(self, chunk_size: int, days: int = None, started_at: datetime = None):
+        super().__init__(chunk_size, days=days, started_at=started_at)
+        self._try_max_timestamp = self._started_at - timedelta(
+            days=days or self.TRY_CYCLE_INTERVAL
+        )
+
+    @property
+    def max_timestamp(self):
+        # the try clause targets the most recent
+        # data this strategy is allowed to touch
+        return self._try_max_timestamp
+
+    @property
+    def try_repo(self):
+        return _get_try_repo_id()
+
+    @property
+    def name(self) -> str:
+        return 'composite removal strategy'
+
+    def remove(self, using: CursorWrapper):
+        try:
+            try_repo = self.try_repo
+        except Repository.DoesNotExist:
+            # some deployments don't ingest try data at all;
+            # fall back to plain main removal there
+            return super().remove(using)
+
+        chunk_size = self._ideal_chunk_size(using)
+
+        # Django's queryset API doesn't support MySQL's
+        # DELETE statements with LIMIT constructs,
+        # even though this database is capable of doing that.
+        #
+        # If ever this support is added in Django, replace
+        # raw SQL bellow with equivalent queryset commands.
+        if self._max_id is not None:
+            # bounding by the probed id turns the delete into a tight
+            # primary-key range scan, instead of a wide index scan
+            # that may revisit rows between calls
+            using.execute(
+                '''
+                DELETE FROM `performance_datum`
+                WHERE (push_timestamp <= %s
+                    OR (repository_id = %s AND push_timestamp <= %s))
+                    AND id <= %s
+                ORDER BY id
+                LIMIT %s
+            ''',
+                [
+                    self._max_timestamp,
+                    try_repo,
+                    self._try_max_timestamp,
+                    self._max_id,
+                    chunk_size,
+                ],
+            )
+        else:
+            # every remaining row is expired, so there's no id boundary
+            using.execute(
+                '''
+                DELETE FROM `performance_datum`
+                WHERE push_timestamp <= %s
+                    OR (repository_id = %s AND push_timestamp <= %s)
+                LIMIT %s
+            ''',
+                [self._max_timestamp, try_repo, self._try_max_timestamp, chunk_size],
+            )
+
+        self._removals_since_probe += 1
+        if using.rowcount < chunk_size:
+            # we've hit the tail of the expired data;
+            # force a fresh probe on the next call
+            self._cached_chunk_size = None
+
+
 class IrrelevantDataRemoval(RemovalStrategy):
     """
     Removes `performance_datum` rows that originate
@@ -227,18 +419,23 @@ class IrrelevantDataRemoval(RemovalStrategy):
         'reference-browser',
     ]
 
+    # how many delete chunks may reuse a cached
+    # chunk size before probing the table again
+    PROBE_REFRESH_INTERVAL = 100
+
     @property
     def CYCLE_INTERVAL(self) -> int:
         # WARNING!! Don't override this without proper approval!
         return 180  # days                                     #
         ########################################################
 
-    def __init__(self, chunk_size: int, days: int = None):
-        super().__init__(chunk_size, days=days)
+    def __init__(self, chunk_size: int, days: int = None, started_at: datetime = None):
+        super().__init__(chunk_size, days=days, started_at=started_at)
 
-        self._manager = PerformanceDatum.objects
         self.__irrelevant_repos = None
         self.__circular_repos = None
+        self._cached_chunk_size = None
+        self._removals_since_probe = 0
 
     @property
     def max_timestamp(self):
@@ -265,7 +462,7 @@ class IrrelevantDataRemoval(RemovalStrategy):
         return 'irrelevant data removal strategy'
 
     def remove(self, using: CursorWrapper):
-        chunk_size = self._find_ideal_chunk_size()
+        chunk_size = self._ideal_chunk_size(using)
 
         # Django's queryset API doesn't support MySQL's
         # DELETE statements with LIMIT constructs,
@@ -286,21 +483,60 @@ class IrrelevantDataRemoval(RemovalStrategy):
             ],
         )
 
-    def _find_ideal_chunk_size(self) -> int:
-        max_id_of_non_expired_row = (
-            self._manager.filter(push_timestamp__gt=self._max_timestamp)
-            .filter(repository_id__in=self.irrelevant_repositories)
-            .order_by('-id')[0]
-            .id
+        self._removals_since_probe += 1
+        if using.rowcount < chunk_size:
+            # we've hit the tail of the expired data;
+            # force a fresh probe on the next call
+            self._cached_chunk_size = None
+
+    def _ideal_chunk_size(self, using: CursorWrapper) -> int:
+        if (
+            self._cached_chunk_size is None
+            # the adaptive sizing may have shrunk the
+            # chunks since the size was last probed
+            or self._cached_chunk_size > self._chunk_size
+            or self._removals_since_probe >= self.PROBE_REFRESH_INTERVAL
+        ):
+            self._cached_chunk_size = self._find_ideal_chunk_size(using)
+            self._removals_since_probe = 0
+        return self._cached_chunk_size
+
+    def _find_ideal_chunk_size(self, using: CursorWrapper) -> int:
+        # probing over a raw cursor returns bare integers, skipping
+        # the ORM's queryset compilation & model instantiation
+        irrelevant_repos = ', '.join(['%s'] * len(self.irrelevant_repositories))
+
+        using.execute(
+            f'''
+            SELECT MAX(id) FROM `performance_datum`
+            WHERE push_timestamp > %s AND repository_id IN ({irrelevant_repos})
+        ''',
+            [self._max_timestamp, *self.irrelevant_repositories],
         )
-        older_perf_data_rows = (
-            self._manager.filter(
-                push_timestamp__lte=self._max_timestamp, id__lte=max_id_of_non_expired_row
-            )
-            .filter(repository_id__in=self.irrelevant_repositories)
-            .order_by('id')[: self._chunk_size]
+        max_id_of_non_expired_row = using.fetchone()[0]
+        if max_id_of_non_expired_row is None:
+            # every remaining row is expired; no boundary to respect
+            return self._chunk_size
+
+        using.execute(
+            f'''
+            SELECT COUNT(*) FROM (
+                SELECT id FROM `performance_datum`
+                WHERE push_timestamp <= %s AND id <= %s
+                    AND repository_id IN ({irrelevant_repos})
+                ORDER BY id
+                LIMIT %s
+            ) older_rows
+        ''',
+            [
+                self._max_timestamp,
+                max_id_of_non_expired_row,
+                *self.irrelevant_repositories,
+                self._chunk_size,
+            ],
         )
-        return len(older_perf_data_rows) or self._chunk_size
+
+        return using.fetchone()[0] or self._chunk_size
 
 
 class StalledDataRemoval(RemovalStrategy):
@@ -315,8 +551,8 @@ class StalledDataRemoval(RemovalStrategy):
         return 120  # days                                     #
         ########################################################
 
-    def __init__(self, chunk_size: int, days: int = None):
-        super().__init__(chunk_size, days=days)
+    def __init__(self, chunk_size: int, days: int = None, started_at: datetime = None):
+        super().__init__(chunk_size, days=days, started_at=started_at)
 
         self._target_signature = None
         self._removable_signatures = None
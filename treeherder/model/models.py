@@ -441,9 +441,9 @@ class JobManager(models.Manager):
                 return jobs_cycled
 
             logger.warning(
-                "Pruning jobs: chunk of {} older than {}".format(
-                    max_chunk["count"], jobs_max_timestamp.strftime("%b %d %Y")
-                )
+                "Pruning jobs: chunk of %s older than %s",
+                max_chunk["count"],
+                jobs_max_timestamp.strftime("%b %d %Y"),
             )
 
             # Remove ORM entries for these jobs that don't currently have a
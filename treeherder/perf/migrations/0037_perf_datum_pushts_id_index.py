@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perf', '0036_cascade_perf_datum_deletion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='performancedatum',
+            index=models.Index(fields=['push_timestamp', 'id'], name='perf_datum_pushts_id_idx'),
+        ),
+    ]
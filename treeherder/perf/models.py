@@ -162,6 +162,12 @@ class PerformanceDatum(models.Model):
             # repository because we currently filter on it in the query)
             ('repository', 'signature', 'push'),
         ]
+        indexes = [
+            # Lets the data cycling resolve its chunk-sizing probes
+            # (MAX(id) for a push_timestamp boundary) off the index,
+            # without a filesort
+            models.Index(fields=['push_timestamp', 'id'], name='perf_datum_pushts_id_idx'),
+        ]
         unique_together = ('repository', 'job', 'push', 'push_timestamp', 'signature')
 
     @staticmethod